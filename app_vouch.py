@@ -1,9 +1,12 @@
+from functools import lru_cache
+
 from algoappdev import *
 from pyteal import *
 
 MAX_VOUCHERS = 8
 
 
+@lru_cache(maxsize=1)
 def build_app() -> apps.AppBuilder:
     # the state consists of 8 indices each for a voucher address
     state = apps.StateLocal(
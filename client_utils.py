@@ -0,0 +1,200 @@
+"""
+Performance helpers for the clients used by the tutorial scripts.
+
+The demo scripts make many small REST calls to the `algod` and `kmd`
+daemons. The stock SDK clients open a fresh HTTP connection per call (paying
+the TCP setup each time) and decode each response body with the stdlib `json`
+module. Calling `install` patches the clients to route calls through a shared
+keep-alive connection pool (via `requests`, when installed) and to decode
+responses with `orjson` (when installed). Both dependencies are optional:
+without them the stock urllib transport and stdlib decoding are kept.
+"""
+
+import base64
+import copy
+import json
+import time
+import urllib.error
+from urllib import parse
+from urllib.request import Request, urlopen
+
+from algosdk import constants, error, kmd
+from algosdk.v2client import algod
+
+try:
+    # orjson is a much faster C implementation of JSON decoding; fall back
+    # to the stdlib when it isn't installed
+    import orjson
+
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+try:
+    # a single session keeps connections alive across calls, so only the
+    # first request to each daemon pays the TCP handshake
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    _session = requests.Session()
+    _adapter = HTTPAdapter(pool_connections=8, pool_maxsize=32)
+    _session.mount("http://", _adapter)
+    _session.mount("https://", _adapter)
+except ImportError:
+    _session = None
+
+
+def _request(url, method, header, data):
+    """
+    Issue the request through the shared connection pool when available,
+    otherwise through a one-shot urllib connection.
+
+    Returns the tuple of response status and body, raising no error for
+    non-success statuses.
+    """
+    if _session is not None:
+        resp = _session.request(method, url, headers=header, data=data)
+        return resp.status_code, resp.content
+    req = Request(url, headers=header, method=method, data=data)
+    try:
+        resp = urlopen(req)
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+    return resp.status, resp.read()
+
+
+def _algod_request(
+    self,
+    method,
+    requrl,
+    params=None,
+    data=None,
+    headers=None,
+    response_format="json",
+):
+    """
+    Drop-in replacement for `AlgodClient.algod_request` which reuses
+    connections and decodes the response body with the faster JSON parser.
+
+    The header and url handling mirrors the SDK implementation.
+    """
+    header = {"User-Agent": "py-algorand-sdk"}
+    if self.headers:
+        header.update(self.headers)
+    if headers:
+        header.update(headers)
+    if requrl not in constants.no_auth:
+        header.update({constants.algod_auth_header: self.algod_token})
+
+    if requrl not in constants.unversioned_paths:
+        requrl = algod.api_version_path_prefix + requrl
+    if params:
+        requrl = requrl + "?" + parse.urlencode(params)
+
+    status, body = _request(self.algod_address + requrl, method, header, data)
+
+    if status >= 400:
+        message = body.decode("utf-8")
+        try:
+            message = json_loads(message)["message"]
+        finally:
+            raise error.AlgodHTTPError(message, status)
+    if response_format == "json":
+        try:
+            return json_loads(body)
+        except Exception as e:
+            raise error.AlgodResponseError(
+                "Failed to parse JSON response from algod"
+            ) from e
+    else:
+        return body
+
+
+def _kmd_request(self, method, requrl, params=None, data=None):
+    """
+    Drop-in replacement for `KMDClient.kmd_request` which reuses connections
+    and decodes the response body with the faster JSON parser.
+
+    The header and url handling mirrors the SDK implementation.
+    """
+    if requrl in constants.no_auth:
+        header = {}
+    else:
+        header = {constants.kmd_auth_header: self.kmd_token}
+
+    if requrl not in constants.unversioned_paths:
+        requrl = kmd.api_version_path_prefix + requrl
+    if params:
+        requrl = requrl + "?" + parse.urlencode(params)
+    if data:
+        data = json.dumps(data, indent=2).encode("utf-8")
+
+    status, body = _request(self.kmd_address + requrl, method, header, data)
+
+    if status >= 400:
+        message = body.decode("utf-8")
+        try:
+            raise error.KMDHTTPError(json_loads(message)["message"])
+        except error.KMDHTTPError:
+            raise
+        except Exception:
+            raise error.KMDHTTPError(message)
+    return json_loads(body)
+
+
+def decode_app_local_state(account_info, app_id: int) -> dict:
+    """
+    Decode the local state of `app_id` from an `account_info` response into
+    a dict mapping the raw key bytes to their Python values.
+
+    Looking keys up with `clients.get_app_local_key` walks and base64
+    decodes the full key list per lookup; decoding the state once lets any
+    number of keys be read in-process.
+    """
+    for app_state in account_info.get("apps-local-state", []):
+        if app_state.get("id", None) != app_id:
+            continue
+        state = {}
+        for key_state in app_state.get("key-value", []):
+            key = base64.b64decode(key_state.get("key", ""))
+            value = key_state.get("value", {})
+            if value.get("type", None) == 1:
+                state[key] = base64.b64decode(value.get("bytes", ""))
+            else:
+                state[key] = value.get("uint", 0)
+        return state
+    return {}
+
+
+# suggested parameters stay valid for some 1000 rounds, so they can be
+# safely reused on this time scale
+PARAMS_TTL_SECONDS = 20.0
+
+# client id -> (fetch time, params)
+_params_cache = {}
+
+
+def cached_suggested_params(algod_client, ttl: float = PARAMS_TTL_SECONDS):
+    """
+    Return the node's suggested transaction parameters, re-fetching at most
+    once per `ttl` seconds per client.
+
+    The returned object is a copy, so callers can mutate it (e.g. set the
+    fee) without poisoning the cache.
+    """
+    now = time.monotonic()
+    cached = _params_cache.get(id(algod_client))
+    if cached is None or now - cached[0] >= ttl:
+        cached = (now, algod_client.suggested_params())
+        _params_cache[id(algod_client)] = cached
+    return copy.copy(cached[1])
+
+
+def install():
+    """
+    Patch `AlgodClient` and `KMDClient` so that all clients (including those
+    built by `algoappdev`) share the connection pool and use the fast
+    response decoding.
+    """
+    algod.AlgodClient.algod_request = _algod_request
+    kmd.KMDClient.kmd_request = _kmd_request
@@ -0,0 +1,9 @@
+"""Pytest configuration shared by the test modules."""
+
+import client_utils
+
+# the dryrun responses parsed by the tests are large (state deltas and
+# program traces per test); route all client traffic through the shared
+# connection pool with the fast JSON decoding before any fixture builds
+# a client
+client_utils.install()
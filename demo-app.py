@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List
 
@@ -9,10 +10,40 @@ from algosdk.encoding import decode_address, encode_address
 from algosdk.future.transaction import ApplicationNoOpTxn, ApplicationOptInTxn
 from algosdk.util import algos_to_microalgos
 
+import client_utils
 from app_vouch import MAX_VOUCHERS, build_app
 
+# the network limits atomic transaction groups to this many transactions
+MAX_GROUP_SIZE = 16
+
+# the app invocation names, encoded once
+SET_NAME = b"set_name"
+VOUCH_FOR = b"vouch_for"
+VOUCH_FROM = b"vouch_from"
+
+
+def submit_grouped(
+    algod_client, txns: List, keys: List[str], max_size: int = MAX_GROUP_SIZE
+) -> List[str]:
+    """
+    Submit independent transactions as atomic groups of up to `max_size`
+    transactions, signing each with its corresponding key.
+
+    Returns the transaction id of each submitted group.
+    """
+    txn_ids: List[str] = []
+    for start in range(0, len(txns), max_size):
+        group = transactions.group_txns(*txns[start : start + max_size])
+        signed = [
+            txn.sign(key) for txn, key in zip(group, keys[start : start + max_size])
+        ]
+        txn_ids.append(algod_client.send_transactions(signed))
+    return txn_ids
+
 
 def main(node_data_dir: Path):
+    client_utils.install()
+
     app_builder = build_app()
 
     algod_client = clients.build_algod_local_client(node_data_dir)
@@ -20,52 +51,59 @@ def main(node_data_dir: Path):
 
     names = ["alice", "bob", "charlie", "dave", "erin", "frank", "grace"]
 
-    # fund the accounts
-    txn_ids: List[str] = []
-    accounts: Dict[str, utils.AccountMeta] = {}
-    for name in names:
-        print(f"funding {name}")
-        account, txid = transactions.fund_from_genesis(
-            algod_client, kmd_client, algos_to_microalgos(1)
+    # fund the accounts: each funding transfer round-trips to kmd and algod,
+    # so dispatch them concurrently and wait for the batch once
+    print("funding accounts")
+    fund_amount = algos_to_microalgos(1)
+    with ThreadPoolExecutor(max_workers=len(names)) as executor:
+        funded = list(
+            executor.map(
+                lambda _: transactions.fund_from_genesis(
+                    algod_client, kmd_client, fund_amount
+                ),
+                names,
+            )
         )
-        accounts[name] = account
-        txn_ids.append(txid)
+    accounts: Dict[str, utils.AccountMeta] = {
+        name: account for name, (account, _) in zip(names, funded)
+    }
+    txn_ids: List[str] = [txid for _, txid in funded]
     # wait until funding has been confrimed
     transactions.get_confirmed_transactions(algod_client, txn_ids, testing.WAIT_ROUNDS)
 
+    # the suggested parameters stay valid for some 1000 rounds, so fetch them
+    # once and reuse them for every transaction in the demo
+    params = client_utils.cached_suggested_params(algod_client)
+
     # build the app
     print("building app")
-    txn = app_builder.create_txn(
-        algod_client, accounts["alice"].address, algod_client.suggested_params()
-    )
+    txn = app_builder.create_txn(algod_client, accounts["alice"].address, params)
     txid = algod_client.send_transaction(txn.sign(accounts["alice"].key))
     # get its id and address (needed to make calls to it)
     app = utils.AppMeta.from_result(
         transactions.get_confirmed_transaction(algod_client, txid, testing.WAIT_ROUNDS)
     )
 
-    # opt-in the accounts to the app
-    txn_ids: List[str] = []
+    # opt-in the accounts and add their name credentials in one pass: group
+    # transactions execute in order within a block, so an account's opt-in
+    # and set_name can share an atomic group, and all the pairs land with a
+    # single confirmation wait (the group size limit is even, so chunking
+    # never splits a pair)
+    print("opting in accounts and adding credentials")
+    txns = []
+    keys = []
     for name in names:
-        print(f"opting in {name}")
-        txn = ApplicationOptInTxn(
-            accounts[name].address, algod_client.suggested_params(), app.app_id
-        )
-        txn_ids.append(algod_client.send_transaction(txn.sign(accounts[name].key)))
-    # wait until the transactions have been confirmed
-    transactions.get_confirmed_transactions(algod_client, txn_ids, testing.WAIT_ROUNDS)
-
-    # adding credentials: setting the name
-    txn_ids: List[str] = []
-    for name in names:
-        print(f"adding credentials for {name}")
-        txn = ApplicationNoOpTxn(
-            accounts[name].address,
-            algod_client.suggested_params(),
-            app.app_id,
-            ["set_name", name.encode("utf8")],
+        txns.append(ApplicationOptInTxn(accounts[name].address, params, app.app_id))
+        txns.append(
+            ApplicationNoOpTxn(
+                accounts[name].address,
+                params,
+                app.app_id,
+                [SET_NAME, name.encode("utf8")],
+            )
         )
-        txn_ids.append(algod_client.send_transaction(txn.sign(accounts[name].key)))
+        keys.extend([accounts[name].key] * 2)
+    txn_ids = submit_grouped(algod_client, txns, keys)
     # wait until the transactions have been confirmed
     transactions.get_confirmed_transactions(algod_client, txn_ids, testing.WAIT_ROUNDS)
 
@@ -82,7 +120,9 @@ def main(node_data_dir: Path):
     # keep track of how many vouches each name received
     num_vouches = defaultdict(int)
 
-    txn_ids: List[str] = []
+    # build and sign all the vouch groups up front, so the submissions go
+    # out back-to-back without interleaved transaction construction
+    signed_groups: List[List] = []
     for name_1, name_2 in vouches:
         print(f"{name_1} vouching for {name_2}")
         # use the next available vouch in the vouchee account
@@ -92,53 +132,51 @@ def main(node_data_dir: Path):
         txns = transactions.group_txns(
             ApplicationNoOpTxn(
                 accounts[name_1].address,
-                algod_client.suggested_params(),
+                params,
                 app.app_id,
-                ["vouch_for", decode_address(accounts[name_2].address)],
+                [VOUCH_FOR, decode_address(accounts[name_2].address)],
             ),
             ApplicationNoOpTxn(
                 accounts[name_2].address,
-                algod_client.suggested_params(),
+                params,
                 app.app_id,
                 [
-                    "vouch_from",
+                    VOUCH_FROM,
                     decode_address(accounts[name_1].address),
                     app_builder.local_state.key_info(f"voucher_{vouch_idx}").key,
                 ],
             ),
         )
-        # submit the transactions in a group
-        txns = [txns[0].sign(accounts[name_1].key), txns[1].sign(accounts[name_2].key)]
-        txn_ids.append(algod_client.send_transactions(txns))
-    # wait until the transactions have been confirmed
-    transactions.get_confirmed_transactions(algod_client, txn_ids, testing.WAIT_ROUNDS)
-
-    # get the names as stored in the app credentials
-    address_to_name = {
-        a.address: clients.get_app_local_key(
-            algod_client.account_info(a.address),
-            app.app_id,
-            app_builder.local_state.key_info("name").key,
+        signed_groups.append(
+            [txns[0].sign(accounts[name_1].key), txns[1].sign(accounts[name_2].key)]
         )
-        for a in accounts.values()
-    }
+    # the groups are independent, so broadcast them concurrently, then wait
+    # once for all the confirmations
+    with ThreadPoolExecutor(max_workers=len(signed_groups)) as executor:
+        txn_ids = list(executor.map(algod_client.send_transactions, signed_groups))
+    transactions.get_confirmed_transactions(algod_client, txn_ids, testing.WAIT_ROUNDS)
 
     # extract vouch information from the accounts
     print("\nParticipants:")
     address_to_name = {a.address: n for n, a in accounts.items()}
+    voucher_keys = [
+        app_builder.local_state.key_info(f"voucher_{i}").key
+        for i in range(MAX_VOUCHERS)
+    ]
     for name in names:
         account = accounts[name]
+        # decode the account's app state once, then read all keys in-process
+        local_state = client_utils.decode_app_local_state(
+            algod_client.account_info(account.address), app.app_id
+        )
         vouchers = []
-        for vouch_idx in range(MAX_VOUCHERS):
-            voucher_address = clients.get_app_local_key(
-                algod_client.account_info(account.address),
-                app.app_id,
-                app_builder.local_state.key_info(f"voucher_{vouch_idx}").key,
-            )
+        for key in voucher_keys:
+            voucher_address = local_state.get(key)
+            # vouches are filled contiguously from index 0, so the first empty
+            # slot means there are no more vouches to read
             if not voucher_address:
-                continue
-            voucher_address = encode_address(voucher_address)
-            vouchers.append(address_to_name[voucher_address])
+                break
+            vouchers.append(address_to_name[encode_address(voucher_address)])
         print("{:8s}: {}".format(name, ", ".join(vouchers)))
 
 
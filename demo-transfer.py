@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from algoappdev import *
@@ -7,88 +8,145 @@ from algosdk.account import generate_account
 from algosdk.future.transaction import PaymentTxn
 from algosdk.mnemonic import from_private_key
 from algosdk.util import algos_to_microalgos, microalgos_to_algos
-from algosdk.wallet import Wallet
 
+import client_utils
+
+WALLET_NAME = "unencrypted-default-wallet"
+
+# arbitrary binary data (up to 1000 bytes) attached to the transaction,
+# encoded once
+NOTE = b"Hello World"
+
+
+def fetch_balances(algod_client, addresses: list) -> dict:
+    """
+    Fetch the balance of each address, in microAlgos.
+
+    Each account's info is fetched once, and the independent reads are
+    issued concurrently so the batch costs one round-trip of latency.
+    """
+    with ThreadPoolExecutor(max_workers=len(addresses)) as executor:
+        infos = executor.map(algod_client.account_info, addresses)
+    return {address: info.get("amount", 0) for address, info in zip(addresses, infos)}
+
+
+def print_balances(balances: dict, sender: str, receiver: str):
+    """Print the sender and receiver balances, in Algos."""
+    print("Balances:")
+    print("  from: {:.6f} Algos".format(microalgos_to_algos(balances[sender])))
+    print("  to  : {:.6f} Algos".format(microalgos_to_algos(balances[receiver])))
+
+
+def send_payments(
+    algod_client, sender_key: str, sender: str, recipients: list, params
+) -> str:
+    """
+    Build, sign and submit one payment per (receiver, amount) pair from
+    `sender`, as a single atomic group, and return the transaction id to
+    wait on.
+
+    Grouping lets up to 16 payments share one submission round-trip and
+    land in the same block; signing with the exported key is an in-process
+    Ed25519 operation, costing no round-trips at all.
+    """
+    txns = [
+        PaymentTxn(sender=sender, sp=params, receiver=receiver, amt=amount, note=NOTE)
+        for receiver, amount in recipients
+    ]
+    if len(txns) > 1:
+        txns = transactions.group_txns(*txns)
+    signed = [txn.sign(sender_key) for txn in txns]
+    if len(signed) == 1:
+        return algod_client.send_transaction(signed[0])
+    return algod_client.send_transactions(signed)
+
+
+def main(node_data_dir: Path, verify: bool = False):
+    client_utils.install()
 
-def main(node_data_dir: Path):
     algod_client = clients.build_algod_local_client(node_data_dir)
     kmd_client = clients.build_kmd_local_client(node_data_dir)
 
-    # get the address of the first account in the wallet
-    wallet = Wallet("unencrypted-default-wallet", "", kmd_client)
-    sender = wallet.list_keys()[0]
+    # open one wallet handle covering the key listing and the key export,
+    # rather than the per-call handle management done by the Wallet class
+    # (which costs two kmd round-trips per operation)
+    wallet_id = next(
+        (w["id"] for w in kmd_client.list_wallets() if w["name"] == WALLET_NAME),
+        None,
+    )
+    if wallet_id is None:
+        raise RuntimeError(f"wallet not found: {WALLET_NAME}")
+    handle = kmd_client.init_wallet_handle(wallet_id, "")
+    try:
+        # the key listing (kmd) and parameter fetch (algod) are independent
+        # round-trips, so issue them together, while the new account is
+        # generated locally in this thread
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            keys_future = executor.submit(kmd_client.list_keys, handle)
+            params_future = executor.submit(
+                client_utils.cached_suggested_params, algod_client
+            )
+            # Create a new standalone account. It is also be possible to
+            # create an account managed by a wallet with `kmd`.
+            # See:
+            # https://developer.algorand.org/docs/features/accounts/create/
+            receiver_key, receiver = generate_account()
+        # the address of the first account in the wallet
+        sender = keys_future.result()[0]
+        # Defaults for the transaction parameters. In particular, there is
+        # a network-wide minimum transaction fee and maximum transaction
+        # duration. This will recommend the minimum fee and will set the
+        # first valid block to the current block, and the last valid block
+        # to the max duration from the current block.
+        # More: https://developer.algorand.org/docs/reference/transactions/
+        params = params_future.result()
+        # export the sender's key once; signing then happens in-process
+        # rather than with a kmd round-trip per signature
+        sender_key = kmd_client.export_key(handle, "", sender)
+    finally:
+        kmd_client.release_wallet_handle(handle)
 
     print("Account details:")
 
     print(f"  genesis address: {sender}")
-
-    # Create a new standalone account. It is also be possible to create an
-    # account managed by a wallet with `kmd`.
-    # See: https://developer.algorand.org/docs/features/accounts/create/
-    receiver_key, receiver = generate_account()
     print(f"  new address: {receiver}")
     print(f"  passphrase : {from_private_key(receiver_key)}")
 
-    print("Balances:")
-    to_account_info = algod_client.account_info(receiver)
-    from_account_info = algod_client.account_info(sender)
-    print(
-        "  from: {:.6f} Algos".format(
-            microalgos_to_algos(from_account_info.get("amount", 0))
-        )
-    )
-    print(
-        "  to  : {:.6f} Algos".format(
-            microalgos_to_algos(to_account_info.get("amount", 0))
-        )
-    )
+    balances = fetch_balances(algod_client, [sender, receiver])
+    print_balances(balances, sender, receiver)
 
     print("Move Algos:")
-    # Can add arbitrary binary data (up to 1000 bytes) to the transaction.
-    note = "Hello World".encode()
-    # Get defaults for the transaction parameters. In particular, there is a
-    # network-wide minimum transaction fee and maximum transaction duration.
-    # This will recommend the minimum fee and will set the first valid block
-    # to the current block, and the last valid block to the max duration from
-    # the current block.
-    # More: https://developer.algorand.org/docs/reference/transactions/
-    params = algod_client.suggested_params()
     # The fee is calculated as:
     # `max(min_fee, fee if not flat_fee else (fee * num_bytes))`
     # where `min_fee` is the minimum fee enforced by the network, and
-    # `num_bytes` is the size of the transaction. Setting the `fee` to zero
-    # means the minimum is used.
+    # `num_bytes` is the size of the transaction. Setting the `fee` to
+    # zero means the minimum is used.
     params.fee = 0
-    txn = PaymentTxn(
-        sender=sender,
-        sp=params,
-        receiver=receiver,
-        amt=algos_to_microalgos(1),
-        note=note,
-    )
-    # looksup the sender address in the wallet and uses its key to sign
-    signed_txn = wallet.sign_transaction(txn)
+    amount = algos_to_microalgos(1)
+    # Send the transaction (a single-payment group here, but any number
+    # of recipients batch the same way).
+    txid = send_payments(algod_client, sender_key, sender, [(receiver, amount)], params)
 
-    # Send the transaction and wait for it to be confirmed.
-    txid = algod_client.send_transaction(signed_txn)
+    # Wait for the transaction to be confirmed.
     print(f"  transaction ID: {txid}")
     print("  waiting for confirmation...")
-    transactions.get_confirmed_transaction(algod_client, txid, 5)
+    confirmed = transactions.get_confirmed_transaction(algod_client, txid, 5)
+    if confirmed is None:
+        raise RuntimeError(f"transaction not confirmed: {txid}")
 
-    # Verify the account balances have changed.
-    print("Balances:")
-    to_account_info = algod_client.account_info(receiver)
-    from_account_info = algod_client.account_info(sender)
-    print(
-        "  from: {:.6f} Algos".format(
-            microalgos_to_algos(from_account_info.get("amount", 0))
-        )
-    )
-    print(
-        "  to  : {:.6f} Algos".format(
-            microalgos_to_algos(to_account_info.get("amount", 0))
-        )
-    )
+    if verify:
+        # re-query the chain for the new balances
+        balances = fetch_balances(algod_client, [sender, receiver])
+    else:
+        # the new balances follow from the confirmed transaction without
+        # further round-trips: the payment moved `amount` and the sender
+        # burned the fee
+        fee = confirmed["txn"]["txn"].get("fee", 0)
+        balances = {
+            sender: balances[sender] - amount - fee,
+            receiver: balances[receiver] + amount,
+        }
+    print_balances(balances, sender, receiver)
 
 
 if __name__ == "__main__":
@@ -96,4 +154,9 @@ if __name__ == "__main__":
 
     parser = argparse.ArgumentParser()
     parser.add_argument("node_data_dir", type=Path)
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="re-query the chain for the final balances",
+    )
     main(**vars(parser.parse_args()))
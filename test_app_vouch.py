@@ -1,3 +1,4 @@
+import pytest
 from algoappdev import *
 from algoappdev.testing import *
 from algosdk.encoding import decode_address
@@ -5,16 +6,40 @@ from algosdk.future.transaction import ApplicationNoOpTxn, ApplicationOptInTxn
 
 import app_vouch
 
+# the test addresses are fixed, so encode each one once at import
+ADDRESS_1 = dryruns.idx_to_address(1)
+ADDRESS_2 = dryruns.idx_to_address(2)
+ADDRESS_3 = dryruns.idx_to_address(3)
+# likewise their decoded 32-byte forms, passed as app call arguments
+ADDRESS_1_RAW = decode_address(ADDRESS_1)
+ADDRESS_2_RAW = decode_address(ADDRESS_2)
+ADDRESS_3_RAW = decode_address(ADDRESS_3)
+# the local state voucher keys, encoded once
+VOUCHER_KEYS = tuple(
+    f"voucher_{i}".encode("utf8") for i in range(app_vouch.MAX_VOUCHERS)
+)
 
-def test_can_set_name(algod_client: AlgodClient):
-    app_builder = app_vouch.build_app()
 
-    address_1 = dryruns.idx_to_address(1)
+@pytest.fixture(scope="module")
+def app_builder() -> apps.AppBuilder:
+    return app_vouch.build_app()
 
+
+@pytest.fixture(scope="module")
+def app_1(algod_client: AlgodClient, app_builder: apps.AppBuilder):
+    return app_builder.build_application(algod_client, 1)
+
+
+@pytest.fixture(scope="module")
+def app_2(algod_client: AlgodClient, app_builder: apps.AppBuilder):
+    return app_builder.build_application(algod_client, 2)
+
+
+def test_can_set_name(algod_client: AlgodClient, app_1):
     result = algod_client.dryrun(
         dryruns.AppCallCtx()
-        .with_app(app_builder.build_application(algod_client, 1))
-        .with_account_opted_in(address=address_1)
+        .with_app(app_1)
+        .with_account_opted_in(address=ADDRESS_1)
         .with_txn_call(args=["set_name", "abc"])
         .build_request()
     )
@@ -22,24 +47,19 @@ def test_can_set_name(algod_client: AlgodClient):
     dryruns.check_err(result)
     assert dryruns.get_messages(result) == ["ApprovalProgram", "PASS"]
     assert dryruns.get_local_deltas(result) == {
-        address_1: [dryruns.KeyDelta(b"name", b"abc")]
+        ADDRESS_1: [dryruns.KeyDelta(b"name", b"abc")]
     }
 
 
-def test_can_vouch(algod_client: AlgodClient):
-    app_builder = app_vouch.build_app()
-
-    address_1 = dryruns.idx_to_address(1)
-    address_2 = dryruns.idx_to_address(2)
-
+def test_can_vouch(algod_client: AlgodClient, app_1):
     result = algod_client.dryrun(
         dryruns.AppCallCtx()
-        .with_app(app_builder.build_application(algod_client, 1))
-        .with_account_opted_in(address=address_1)
-        .with_txn_call(args=["vouch_for", decode_address(address_2)])
-        .with_account_opted_in(address=address_2)
+        .with_app(app_1)
+        .with_account_opted_in(address=ADDRESS_1)
+        .with_txn_call(args=["vouch_for", ADDRESS_2_RAW])
+        .with_account_opted_in(address=ADDRESS_2)
         .with_txn_call(
-            args=["vouch_from", decode_address(address_1), "voucher_0"],
+            args=["vouch_from", ADDRESS_1_RAW, "voucher_0"],
         )
         .build_request()
     )
@@ -47,26 +67,18 @@ def test_can_vouch(algod_client: AlgodClient):
     dryruns.check_err(result)
     assert dryruns.get_messages(result, 1) == ["ApprovalProgram", "PASS"]
     assert dryruns.get_local_deltas(result, 1) == {
-        address_2: [dryruns.KeyDelta(b"voucher_0", decode_address(address_1))]
+        ADDRESS_2: [dryruns.KeyDelta(b"voucher_0", ADDRESS_1_RAW)]
     }
 
 
-def test_set_name_removes_vouches(algod_client: AlgodClient):
-    app_builder = app_vouch.build_app()
-
-    address_1 = dryruns.idx_to_address(1)
-    address_2 = dryruns.idx_to_address(2)
-
+def test_set_name_removes_vouches(algod_client: AlgodClient, app_1):
     result = algod_client.dryrun(
         dryruns.AppCallCtx()
-        .with_app(app_builder.build_application(algod_client, 1))
+        .with_app(app_1)
         .with_account_opted_in(
-            address=address_1,
+            address=ADDRESS_1,
             local_state=[
-                utils.to_key_value(
-                    f"voucher_{i}".encode("utf8"), decode_address(address_2)
-                )
-                for i in range(app_vouch.MAX_VOUCHERS)
+                utils.to_key_value(key, ADDRESS_2_RAW) for key in VOUCHER_KEYS
             ],
         )
         .with_txn_call(args=["set_name", "abc"])
@@ -76,34 +88,26 @@ def test_set_name_removes_vouches(algod_client: AlgodClient):
     dryruns.check_err(result)
     assert dryruns.get_messages(result) == ["ApprovalProgram", "PASS"]
 
-    deltas = dryruns.get_local_deltas(result)[address_1]
+    deltas = dryruns.get_local_deltas(result)[ADDRESS_1]
     assert set(deltas) == set(
         # set the name
         [dryruns.KeyDelta(b"name", b"abc")]
         # cleared all previous vouches
-        + [
-            dryruns.KeyDelta(f"voucher_{i}".encode("utf8"), None)
-            for i in range(app_vouch.MAX_VOUCHERS)
-        ]
+        + [dryruns.KeyDelta(key, None) for key in VOUCHER_KEYS]
     )
 
 
-def test_cannot_vouch_past_max(algod_client: AlgodClient):
-    app_builder = app_vouch.build_app()
-
-    address_1 = dryruns.idx_to_address(1)
-    address_2 = dryruns.idx_to_address(2)
-
+def test_cannot_vouch_past_max(algod_client: AlgodClient, app_1):
     result = algod_client.dryrun(
         dryruns.AppCallCtx()
-        .with_app(app_builder.build_application(algod_client, 1))
-        .with_account_opted_in(address=address_1)
-        .with_txn_call(args=["vouch_for", decode_address(address_2)])
-        .with_account_opted_in(address=address_2)
+        .with_app(app_1)
+        .with_account_opted_in(address=ADDRESS_1)
+        .with_txn_call(args=["vouch_for", ADDRESS_2_RAW])
+        .with_account_opted_in(address=ADDRESS_2)
         .with_txn_call(
             args=[
                 "vouch_from",
-                decode_address(address_1),
+                ADDRESS_1_RAW,
                 f"voucher_{app_vouch.MAX_VOUCHERS}",
             ],
         )
@@ -114,22 +118,17 @@ def test_cannot_vouch_past_max(algod_client: AlgodClient):
     assert dryruns.get_messages(result, 1)[:2] == ["ApprovalProgram", "REJECT"]
 
 
-def test_cannot_vouch_without_voucher(algod_client: AlgodClient):
-    app_builder = app_vouch.build_app()
-
-    address_1 = dryruns.idx_to_address(1)
-    address_2 = dryruns.idx_to_address(2)
-
+def test_cannot_vouch_without_voucher(algod_client: AlgodClient, app_1):
     result = algod_client.dryrun(
         dryruns.AppCallCtx()
-        .with_app(app_builder.build_application(algod_client, 1))
-        .with_account_opted_in(address=address_1)
-        .with_txn_call(args=["vouch_for", decode_address(address_2)])
-        .with_account_opted_in(address=address_2)
+        .with_app(app_1)
+        .with_account_opted_in(address=ADDRESS_1)
+        .with_txn_call(args=["vouch_for", ADDRESS_2_RAW])
+        .with_account_opted_in(address=ADDRESS_2)
         .with_txn_call(
             args=[
                 "vouch_from",
-                decode_address(address_1),
+                ADDRESS_1_RAW,
                 f"voucher_{app_vouch.MAX_VOUCHERS}",
             ],
         )
@@ -140,17 +139,12 @@ def test_cannot_vouch_without_voucher(algod_client: AlgodClient):
     assert dryruns.get_messages(result, 1)[:2] == ["ApprovalProgram", "REJECT"]
 
 
-def test_cannot_vouch_without_vouchee(algod_client: AlgodClient):
-    app_builder = app_vouch.build_app()
-
-    address_1 = dryruns.idx_to_address(1)
-    address_2 = dryruns.idx_to_address(2)
-
+def test_cannot_vouch_without_vouchee(algod_client: AlgodClient, app_1):
     result = algod_client.dryrun(
         dryruns.AppCallCtx()
-        .with_app(app_builder.build_application(algod_client, 1))
-        .with_account_opted_in(address=address_1)
-        .with_txn_call(args=["vouch_for", decode_address(address_2)])
+        .with_app(app_1)
+        .with_account_opted_in(address=ADDRESS_1)
+        .with_txn_call(args=["vouch_for", ADDRESS_2_RAW])
         .build_request()
     )
 
@@ -160,21 +154,15 @@ def test_cannot_vouch_without_vouchee(algod_client: AlgodClient):
     assert not dryruns.get_local_deltas(result, 0)
 
 
-def test_cannot_vouch_with_wrong_voucher(algod_client: AlgodClient):
-    app_builder = app_vouch.build_app()
-
-    address_1 = dryruns.idx_to_address(1)
-    address_2 = dryruns.idx_to_address(2)
-    address_3 = dryruns.idx_to_address(3)
-
+def test_cannot_vouch_with_wrong_voucher(algod_client: AlgodClient, app_1):
     result = algod_client.dryrun(
         dryruns.AppCallCtx()
-        .with_app(app_builder.build_application(algod_client, 1))
-        .with_account_opted_in(address=address_1)
-        .with_txn_call(args=["vouch_for", decode_address(address_2)])
-        .with_account_opted_in(address=address_2)
+        .with_app(app_1)
+        .with_account_opted_in(address=ADDRESS_1)
+        .with_txn_call(args=["vouch_for", ADDRESS_2_RAW])
+        .with_account_opted_in(address=ADDRESS_2)
         .with_txn_call(
-            args=["vouch_from", decode_address(address_3), "voucher_0"],
+            args=["vouch_from", ADDRESS_3_RAW, "voucher_0"],
         )
         .build_request()
     )
@@ -183,21 +171,15 @@ def test_cannot_vouch_with_wrong_voucher(algod_client: AlgodClient):
     assert dryruns.get_messages(result, 1)[:2] == ["ApprovalProgram", "REJECT"]
 
 
-def test_cannot_vouch_with_wrong_vouchee(algod_client: AlgodClient):
-    app_builder = app_vouch.build_app()
-
-    address_1 = dryruns.idx_to_address(1)
-    address_2 = dryruns.idx_to_address(2)
-    address_3 = dryruns.idx_to_address(3)
-
+def test_cannot_vouch_with_wrong_vouchee(algod_client: AlgodClient, app_1):
     result = algod_client.dryrun(
         dryruns.AppCallCtx()
-        .with_app(app_builder.build_application(algod_client, 1))
-        .with_account_opted_in(address=address_1)
-        .with_txn_call(args=["vouch_for", decode_address(address_3)])
-        .with_account_opted_in(address=address_2)
+        .with_app(app_1)
+        .with_account_opted_in(address=ADDRESS_1)
+        .with_txn_call(args=["vouch_for", ADDRESS_3_RAW])
+        .with_account_opted_in(address=ADDRESS_2)
         .with_txn_call(
-            args=["vouch_from", decode_address(address_1), "voucher_0"],
+            args=["vouch_from", ADDRESS_1_RAW, "voucher_0"],
         )
         .build_request()
     )
@@ -206,22 +188,17 @@ def test_cannot_vouch_with_wrong_vouchee(algod_client: AlgodClient):
     assert dryruns.get_messages(result, 1)[:2] == ["ApprovalProgram", "REJECT"]
 
 
-def test_cannot_vouch_with_other_app_voucher(algod_client: AlgodClient):
-    app_builder = app_vouch.build_app()
-
-    address_1 = dryruns.idx_to_address(1)
-    address_2 = dryruns.idx_to_address(2)
-
+def test_cannot_vouch_with_other_app_voucher(algod_client: AlgodClient, app_1, app_2):
     result = algod_client.dryrun(
         dryruns.AppCallCtx()
-        .with_app(app_builder.build_application(algod_client, 1))
-        .with_account_opted_in(address=address_1)
-        .with_txn_call(args=["vouch_for", decode_address(address_2)])
+        .with_app(app_1)
+        .with_account_opted_in(address=ADDRESS_1)
+        .with_txn_call(args=["vouch_for", ADDRESS_2_RAW])
         # NOTE: different app id
-        .with_app(app_builder.build_application(algod_client, 2))
-        .with_account_opted_in(address=address_2)
+        .with_app(app_2)
+        .with_account_opted_in(address=ADDRESS_2)
         .with_txn_call(
-            args=["vouch_from", decode_address(address_1), "voucher_0"],
+            args=["vouch_from", ADDRESS_1_RAW, "voucher_0"],
         )
         .build_request()
     )
@@ -230,68 +207,62 @@ def test_cannot_vouch_with_other_app_voucher(algod_client: AlgodClient):
     assert dryruns.get_messages(result, 1)[:2] == ["ApprovalProgram", "REJECT"]
 
 
-def test_integration(algod_client: AlgodClient, funded_account: AccountMeta):
-    app_builder = app_vouch.build_app()
+def test_integration(
+    algod_client: AlgodClient,
+    funded_account: AccountMeta,
+    app_builder: apps.AppBuilder,
+):
+    # the parameters remain valid for the duration of the test, so one
+    # round-trip provides them for all the transactions below
+    params = algod_client.suggested_params()
 
-    txn = app_builder.create_txn(
-        algod_client, funded_account.address, algod_client.suggested_params()
-    )
-    txid = algod_client.send_transaction(txn.sign(funded_account.key))
+    account_raw = decode_address(funded_account.address)
+    key = funded_account.key
+
+    txn = app_builder.create_txn(algod_client, funded_account.address, params)
+    txid = algod_client.send_transaction(txn.sign(key))
     app_meta = utils.AppMeta.from_result(
         transactions.get_confirmed_transaction(algod_client, txid, WAIT_ROUNDS)
     )
 
-    txn = ApplicationOptInTxn(
-        funded_account.address, algod_client.suggested_params(), app_meta.app_id
-    )
-    txid = algod_client.send_transaction(txn.sign(funded_account.key))
-    transactions.get_confirmed_transaction(algod_client, txid, testing.WAIT_ROUNDS)
-
-    txn = ApplicationNoOpTxn(
-        funded_account.address,
-        algod_client.suggested_params(),
-        app_meta.app_id,
-        ["set_name", "Name"],
-    )
-    txid = algod_client.send_transaction(txn.sign(funded_account.key))
-    transactions.get_confirmed_transaction(algod_client, txid, testing.WAIT_ROUNDS)
-
+    # the remaining calls can land in a single atomic group: transactions in
+    # a group execute in order within one block, and the vouch_from logic
+    # reads the transaction preceding it in the group
     txns = transactions.group_txns(
+        ApplicationOptInTxn(funded_account.address, params, app_meta.app_id),
+        ApplicationNoOpTxn(
+            funded_account.address,
+            params,
+            app_meta.app_id,
+            ["set_name", "Name"],
+        ),
         ApplicationNoOpTxn(
             funded_account.address,
-            algod_client.suggested_params(),
+            params,
             app_meta.app_id,
-            ["vouch_for", decode_address(funded_account.address)],
+            ["vouch_for", account_raw],
         ),
         ApplicationNoOpTxn(
             funded_account.address,
-            algod_client.suggested_params(),
+            params,
             app_meta.app_id,
             [
                 "vouch_from",
-                decode_address(funded_account.address),
+                account_raw,
                 app_builder.local_state.key_info("voucher_0").key,
             ],
         ),
     )
-    txns = [txns[0].sign(funded_account.key), txns[1].sign(funded_account.key)]
-    txids = algod_client.send_transactions(txns)
+    txns = [txn.sign(key) for txn in txns]
+    txid = algod_client.send_transactions(txns)
     transactions.get_confirmed_transaction(algod_client, txid, testing.WAIT_ROUNDS)
 
-    assert (
-        clients.get_app_local_key(
-            algod_client.account_info(funded_account.address),
-            app_meta.app_id,
-            b"name",
-        )
-        == b"Name"
-    )
+    # one fetch serves both state assertions
+    account_info = algod_client.account_info(funded_account.address)
+
+    assert clients.get_app_local_key(account_info, app_meta.app_id, b"name") == b"Name"
 
     assert (
-        clients.get_app_local_key(
-            algod_client.account_info(funded_account.address),
-            app_meta.app_id,
-            b"voucher_0",
-        )
-        == decode_address(funded_account.address)
+        clients.get_app_local_key(account_info, app_meta.app_id, b"voucher_0")
+        == account_raw
     )